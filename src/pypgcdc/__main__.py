@@ -23,7 +23,9 @@ SOFTWARE.
 """
 import contextlib
 import logging
+import logging.handlers
 import os
+import queue
 
 from pypgcdc import DataStore, LogicalReplicationReader, MetadataStore
 
@@ -35,8 +37,19 @@ QUIET = os.environ.get("PYPGCDC_VERBOSE", "False").lower() not in ("1", "true",
 
 
 def main():
-    logging.basicConfig(level=logging.DEBUG)
-    logging.getLogger("pypgcdc").info(f"Running logical replication with ")
+    # the data store logs every message so the records are written by a separate thread
+    # to keep the slow terminal i/o away from the replication connection
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    # the records are formatted with the usual LEVEL:logger: prefix by the listener thread; the queue handler
+    # only merges the arguments into the message so the prefix isn't added twice
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    logging.basicConfig(level=logging.DEBUG, handlers=[queue_handler])
+    listener.start()
+    logging.getLogger("pypgcdc").info("Running logical replication with %s/%s", PUBLICATION, SLOT)
     meta = MetadataStore()
     data = DataStore(quiet=QUIET)
     cdc_reader = LogicalReplicationReader(
@@ -47,9 +60,12 @@ def main():
         metadata_store=meta,
         data_store=data,
     )
-    with contextlib.suppress(KeyboardInterrupt):
-        with cdc_reader:
-            cdc_reader.consume_stream()
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            with cdc_reader:
+                cdc_reader.consume_stream()
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -23,7 +23,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import io
+import struct
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
@@ -35,18 +35,24 @@ INT16 = 2
 INT32 = 4
 INT64 = 8
 
+# precompiled big-endian signed integer formats; unpacking from the buffer doesn't create a slice
+INT8_STRUCT = struct.Struct(">b")
+INT16_STRUCT = struct.Struct(">h")
+INT32_STRUCT = struct.Struct(">i")
+INT64_STRUCT = struct.Struct(">q")
+
 
 def convert_pg_ts(_ts_in_microseconds: int) -> datetime:
     ts = datetime(2000, 1, 1, 0, 0, 0, 0, tzinfo=timezone.utc)
     return ts + timedelta(microseconds=_ts_in_microseconds)
 
 
-def convert_bytes_to_int(_in_bytes: bytes) -> int:
+def convert_bytes_to_int(_in_bytes: Union[bytes, memoryview]) -> int:
     return int.from_bytes(_in_bytes, byteorder="big", signed=True)
 
 
-def convert_bytes_to_utf8(_in_bytes: Union[bytes, bytearray]) -> str:
-    return _in_bytes.decode("utf-8")
+def convert_bytes_to_utf8(_in_bytes: Union[bytes, bytearray, memoryview]) -> str:
+    return str(_in_bytes, "utf-8")
 
 
 @dataclass(frozen=True)
@@ -64,6 +70,13 @@ class ColumnData:
         )
 
 
+# raw bytes of the column data categories in TupleData
+COLUMN_NULL, COLUMN_UNCHANGED, COLUMN_TEXT = b"nut"
+# the columns without a value are immutable so the same instances are shared by all tuples
+NULL_COLUMN = ColumnData(col_data_category="n")
+UNCHANGED_COLUMN = ColumnData(col_data_category="u")
+
+
 @dataclass(frozen=True)
 class ColumnType:
     """https://www.postgresql.org/docs/12/catalog-pg-attribute.html"""
@@ -84,9 +97,12 @@ class TupleData:
 
 
 class PgoutputMessage(ABC):
-    def __init__(self, buffer: bytes):
-        self.buffer: io.BytesIO = io.BytesIO(buffer)
-        self.byte1: str = self.read_utf8(1)
+    def __init__(self, buffer: Union[bytes, memoryview]):
+        # reading from a memoryview slices the payload without copying it
+        self.buffer: memoryview = memoryview(buffer)
+        # the message type is a single ascii character, chr avoids slicing and decoding the buffer
+        self.byte1: str = chr(self.buffer[0])
+        self.offset: int = 1
         self.decode_buffer()
 
     @abstractmethod
@@ -97,29 +113,44 @@ class PgoutputMessage(ABC):
     def __repr__(self) -> str:
         """Implemented for each message type"""
 
+    def read(self, n: int) -> memoryview:
+        start = self.offset
+        end = self.offset = start + n
+        return self.buffer[start:end]
+
     def read_int8(self) -> int:
-        return convert_bytes_to_int(self.buffer.read(INT8))
+        value = INT8_STRUCT.unpack_from(self.buffer, self.offset)[0]
+        self.offset += INT8
+        return value
 
     def read_int16(self) -> int:
-        return convert_bytes_to_int(self.buffer.read(INT16))
+        value = INT16_STRUCT.unpack_from(self.buffer, self.offset)[0]
+        self.offset += INT16
+        return value
 
     def read_int32(self) -> int:
-        return convert_bytes_to_int(self.buffer.read(INT32))
+        value = INT32_STRUCT.unpack_from(self.buffer, self.offset)[0]
+        self.offset += INT32
+        return value
 
     def read_int64(self) -> int:
-        return convert_bytes_to_int(self.buffer.read(INT64))
+        value = INT64_STRUCT.unpack_from(self.buffer, self.offset)[0]
+        self.offset += INT64
+        return value
 
     def read_utf8(self, n: int = 1) -> str:
-        return convert_bytes_to_utf8(self.buffer.read(n))
+        return convert_bytes_to_utf8(self.read(n))
 
     def read_timestamp(self) -> datetime:
         # 8 chars -> int64 -> timestamp
         return convert_pg_ts(_ts_in_microseconds=self.read_int64())
 
     def read_string(self) -> str:
-        output = bytearray()
-        while (next_char := self.buffer.read(1)) != b"\x00":
-            output += next_char
+        end = self.offset
+        while self.buffer[end] != 0:
+            end += 1
+        output = self.read(end - self.offset)
+        self.offset += 1  # skip the terminating null byte
         return convert_bytes_to_utf8(output)
 
     def read_tuple_data(self) -> TupleData:
@@ -139,22 +170,27 @@ class PgoutputMessage(ABC):
         # TODO: investigate what happens with the generated columns
         column_data = list()
         n_columns = self.read_int16()
+        buffer = self.buffer
         for column in range(n_columns):
-            col_data_category = self.read_utf8()
-            if col_data_category in ("n", "u"):
-                # "n"=NULL, "t"=TOASTed
-                column_data.append(ColumnData(col_data_category=col_data_category))
-            elif col_data_category == "t":
+            # compare the raw byte of the category instead of decoding it for every column
+            col_data_category = buffer[self.offset]
+            self.offset += 1
+            if col_data_category == COLUMN_TEXT:
                 # t = tuple
                 col_data_length = self.read_int32()
                 col_data = self.read_utf8(col_data_length)
                 column_data.append(
                     ColumnData(
-                        col_data_category=col_data_category,
+                        col_data_category="t",
                         col_data_length=col_data_length,
                         col_data=col_data,
                     )
                 )
+            elif col_data_category == COLUMN_NULL:
+                column_data.append(NULL_COLUMN)
+            elif col_data_category == COLUMN_UNCHANGED:
+                # "u"=unchanged TOASTed value
+                column_data.append(UNCHANGED_COLUMN)
         return TupleData(n_columns=n_columns, column_data=column_data)
 
 
@@ -180,7 +216,7 @@ class Begin(PgoutputMessage):
             raise ValueError("first byte in buffer does not match Begin message")
         self.lsn = self.read_int64()
         self.commit_ts = self.read_timestamp()
-        self.tx_xid = self.read_int64()
+        self.tx_xid = self.read_int32()
 
     def __repr__(self) -> str:
         return (
@@ -374,7 +410,7 @@ class Update(PgoutputMessage):
         if self.new_tuple_byte != "N":
             # TODO: test exception handling
             raise ValueError(
-                f"did not find new_tuple_byte ('N') at position: {self.buffer.tell()}, found: '{self.new_tuple_byte}'"
+                f"did not find new_tuple_byte ('N') at position: {self.offset}, found: '{self.new_tuple_byte}'"
             )
         self.new_tuple = self.read_tuple_data()
 
@@ -1,18 +1,88 @@
+import dataclasses
+import functools
+import json
 import typing
 from datetime import datetime
 from enum import Enum
 
-import pydantic
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
 
 
-class ReplicationMessage(pydantic.BaseModel):
-    message_id: pydantic.UUID4
+def _json_default(value: typing.Any) -> typing.Any:
+    if isinstance(value, Serializable):
+        return value.dict()
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # like pydantic, bytes are serialized as text; bytes that aren't valid utf-8 are escaped
+        return bytes(value).decode("utf-8", errors="backslashreplace")
+    return str(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _json_encoder(indent: typing.Optional[int]) -> json.JSONEncoder:
+    # json.dumps builds a new encoder on every call when it is given any options
+    return json.JSONEncoder(indent=indent, default=_json_default)
+
+
+def json_dumps(value: typing.Any, indent: typing.Optional[int] = None) -> str:
+    """Serialize `value` to JSON using orjson if it is installed
+
+    orjson serializes dataclasses, datetimes and UUIDs natively and only supports an indent of 2.
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(value, default=_json_default, option=option).decode("utf-8")
+    return _json_encoder(indent).encode(value)
+
+
+class Serializable:
+    """Provides the `dict` and `json` methods of pydantic models for the dataclasses below"""
+
+    __slots__ = ()
+
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        return dataclasses.asdict(self)
+
+    def json(self, indent: typing.Optional[int] = None) -> str:
+        return json_dumps(self, indent=indent)
+
+
+# the models below are created for every replication message so they are plain dataclasses
+# to avoid the cost of pydantic validation; the data comes from the decoders and is already typed
+@dataclasses.dataclass
+class ReplicationMessage(Serializable):
+    # there is one instance per replication message and none of the fields has a default,
+    # so the slots can be declared by hand (`dataclass(slots=True)` needs python 3.10)
+    __slots__ = ("message_id", "data_start", "payload", "send_time", "data_size", "wal_end")
+
+    message_id: int
     data_start: int
-    payload: bytes
+    # memoryview of the raw message so the decoders can read it without copying; pydantic can't validate it
+    payload: typing.Any
     send_time: datetime
     data_size: int
     wal_end: int
 
+    def dict(self) -> typing.Dict[str, typing.Any]:
+        # `dataclasses.asdict` deep-copies the fields and a memoryview can't be copied, so it is converted to bytes
+        return {
+            "message_id": self.message_id,
+            "data_start": self.data_start,
+            "payload": bytes(self.payload),
+            "send_time": self.send_time,
+            "data_size": self.data_size,
+            "wal_end": self.wal_end,
+        }
+
+    def json(self, indent: typing.Optional[int] = None) -> str:
+        return json_dumps(self.dict(), indent=indent)
+
 
 class OperationType(Enum):
     INSERT = "I"
@@ -25,7 +95,8 @@ class OperationType(Enum):
     RELATION = "R"
 
 
-class ColumnDefinition(pydantic.BaseModel):
+@dataclasses.dataclass(frozen=True)
+class ColumnDefinition(Serializable):
     name: str
     part_of_pkey: bool
     type_id: int
@@ -33,26 +104,38 @@ class ColumnDefinition(pydantic.BaseModel):
     optional: bool
 
 
-class TableSchema(pydantic.BaseModel):
+@dataclasses.dataclass
+class TableSchema(Serializable):
     column_definitions: typing.List[ColumnDefinition]
     db: str
     namespace: str
     table: str
     relation_id: int
 
-    def get_key_columns(self) -> typing.List[str]:
-        return [col.name for col in self.column_definitions if col.part_of_pkey]
+    def __post_init__(self) -> None:
+        # column names in the order of the tuple data; private and not a field so it is never serialized
+        self._column_names: typing.Tuple[str, ...] = tuple(col.name for col in self.column_definitions)
+        self._key_columns: typing.Tuple[str, ...] = tuple(
+            col.name for col in self.column_definitions if col.part_of_pkey
+        )
+        # the part of the key of every change event that identifies the table
+        self._key_meta: typing.Dict[str, str] = {"database": self.db, "namespace": self.namespace, "table": self.table}
+
+    def get_key_columns(self) -> typing.Tuple[str, ...]:
+        return self._key_columns
 
 
-class Transaction(pydantic.BaseModel):
+@dataclasses.dataclass
+class Transaction(Serializable):
     op: str
     tx_id: int
     begin_lsn: int
-    commit_lsn: typing.Optional[int] = None
     commit_ts: datetime
+    commit_lsn: typing.Optional[int] = None
 
 
-class SlotInitInfo(pydantic.BaseModel):
+@dataclasses.dataclass(frozen=True)
+class SlotInitInfo(Serializable):
     dsn: str
     publication_name: str
     slot_name: str
@@ -61,16 +144,14 @@ class SlotInitInfo(pydantic.BaseModel):
     plugin: str
 
 
-class ChangeEvent(pydantic.BaseModel):
-    op: OperationType
-    message_id: pydantic.UUID4
+@dataclasses.dataclass
+class ChangeEvent(Serializable):
+    op: str  # value of OperationType
+    message_id: int
     lsn: int
     transaction: Transaction  # replication/source metadata
-    table_schema: TableSchema
-    table_schemata: typing.Optional[typing.List[TableSchema]]
-    before: typing.Optional[typing.Dict[str, typing.Any]]  # depends on the source table
-    after: typing.Optional[typing.Dict[str, typing.Any]]
-    key: typing.Optional[typing.Dict[str, typing.Any]]
-
-    class Config:
-        use_enum_values = True
+    table_schema: typing.Optional[TableSchema] = None
+    table_schemata: typing.Optional[typing.List[TableSchema]] = None
+    before: typing.Optional[typing.Dict[str, typing.Any]] = None  # depends on the source table
+    after: typing.Optional[typing.Dict[str, typing.Any]] = None
+    key: typing.Optional[typing.Dict[str, typing.Any]] = None
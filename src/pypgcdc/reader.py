@@ -23,11 +23,17 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 import contextlib
+import functools
+import itertools
+import json
 import logging
+import queue
+import re
+import select
+import threading
 import typing
-import uuid
-from collections import OrderedDict
-from datetime import datetime
+import weakref
+from datetime import datetime, timedelta, timezone
 
 import psycopg2
 import psycopg2.extras
@@ -43,33 +49,102 @@ from pypgcdc.models import (
     TableSchema,
     Transaction,
 )
-from pypgcdc.stores import DataStore, MetadataStore
+from pypgcdc.stores import DataStore, MetadataStore, convert_pg_type_to_py_type
 from pypgcdc.utils import SourceDBHandler
 
 logger = logging.getLogger(__name__)
 
+# the first byte of a pgoutput message (an int when indexing the payload) identifies the message type
+MSG_RELATION, MSG_BEGIN, MSG_INSERT, MSG_UPDATE, MSG_DELETE, MSG_TRUNCATE, MSG_COMMIT = map(ord, "RBIUDTC")
+# messages with the relation id right after the message type
+ROW_MESSAGES = frozenset((MSG_INSERT, MSG_UPDATE, MSG_DELETE))
+# the operations that can be skipped with `op_filter`
+FILTERABLE_OPERATIONS = frozenset(
+    op.value for op in (OperationType.INSERT, OperationType.UPDATE, OperationType.DELETE, OperationType.TRUNCATE)
+)
+# maximum seconds the stream is waited on before the reader checks the worker thread for an error
+WORKER_POLL_INTERVAL = 1.0
+# maximum seconds to wait for the worker thread to finish the message it is handling when the reader is aborted
+WORKER_STOP_TIMEOUT = 10.0
+
+
+def map_tuple_to_dict(
+    tuple_data: decoders.TupleData,
+    relation: TableSchema,
+    converters: typing.Optional[typing.Sequence[typing.Optional[typing.Callable[[str], typing.Any]]]] = None,
+) -> typing.Dict[str, typing.Any]:
+    """Convert tuple data to a dict with keys from relation mapped in order to tuple data
+
+    If `converters` are given, non-null values are converted by the converter at the same index (if any).
+    Kept as public API; the reader itself uses the faster functions built by `compile_row_builder`.
+    """
+    values = [col.col_data for col in tuple_data.column_data]
+    if converters:
+        values = [
+            value if value is None or converter is None else converter(value)
+            for value, converter in zip(values, converters)
+        ]
+    return dict(zip(relation._column_names, values))
+
+
+def compile_row_builder(
+    column_names: typing.Sequence[str],
+    converters: typing.Optional[typing.Sequence[typing.Optional[typing.Callable[[str], typing.Any]]]] = None,
+) -> typing.Callable[[typing.Sequence[decoders.ColumnData]], typing.Dict[str, typing.Any]]:
+    """Generate a function that builds the row dict of a relation from the column data of a tuple
+
+    The function is specialised for the columns of the relation so there is no loop or zip per row;
+    it behaves the same as `map_tuple_to_dict` with the same column names and converters.
+    """
+    namespace: typing.Dict[str, typing.Any] = {}
+    lines = ["def build_row(columns):"]
+    items = []
+    for i, name in enumerate(column_names):
+        converter = converters[i] if converters else None
+        if converter is None:
+            items.append(f"{name!r}: columns[{i}].col_data")
+        else:
+            namespace[f"convert_{i}"] = converter
+            lines.append(f"    value_{i} = columns[{i}].col_data")
+            items.append(f"{name!r}: None if value_{i} is None else convert_{i}(value_{i})")
+    lines.append(f"    return {{{', '.join(items)}}}")
+    exec("\n".join(lines), namespace)
+    return namespace["build_row"]
 
-def map_tuple_to_dict(tuple_data: decoders.TupleData, relation: TableSchema) -> typing.OrderedDict[str, typing.Any]:
-    """Convert tuple data to an OrderedDict with keys from relation mapped in order to tuple data"""
-    output: typing.OrderedDict[str, typing.Any] = OrderedDict()
-    for idx, col in enumerate(tuple_data.column_data):
-        column_name = relation.column_definitions[idx].name
-        output[column_name] = col.col_data
-    return output
 
+# the text output of timestamp and timestamptz columns, e.g. 2020-01-01 12:30:00.123456+05:30
+TIMESTAMP_RE = re.compile(
+    r"(\d{4,})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?(?:([+-])(\d\d)(?::?(\d\d))?(?::?(\d\d))?)?"
+)
 
-def convert_pg_type_to_py_type(pg_type_name: str) -> type:
-    if pg_type_name in ("bigint", "integer", "smallint"):
-        return int
-    elif pg_type_name in ("timestamp with time zone", "timestamp without time zone"):
-        return datetime
-        # json not tested yet
-    elif pg_type_name in ("json", "jsonb"):
-        return pydantic.Json
-    elif pg_type_name[:7] == "numeric":
-        return float
-    else:
-        return str
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse the text value of a timestamp column; the result is timezone aware if the value has an offset"""
+    match = TIMESTAMP_RE.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    year, month, day, hour, minute, second, fraction, sign, tz_hours, tz_minutes, tz_seconds = match.groups()
+    tzinfo = None
+    if sign:
+        offset = timedelta(hours=int(tz_hours), minutes=int(tz_minutes or 0), seconds=int(tz_seconds or 0))
+        tzinfo = timezone(-offset if sign == "-" else offset)
+    microsecond = int(fraction.ljust(6, "0")) if fraction else 0
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second), microsecond, tzinfo=tzinfo)
+
+
+# text values of these python types are already strings so they don't need a converter
+PY_TYPE_CONVERTERS: typing.Dict[typing.Any, typing.Callable[[str], typing.Any]] = {
+    int: int,
+    float: float,
+    datetime: parse_timestamp,
+    pydantic.Json: json.loads,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def convert_pg_type_to_converter(pg_type_name: str) -> typing.Optional[typing.Callable[[str], typing.Any]]:
+    """Return a function converting the text value of a column to its python type (None for strings)"""
+    return PY_TYPE_CONVERTERS.get(convert_pg_type_to_py_type(pg_type_name))
 
 
 class LogicalReplicationReader:
@@ -80,6 +155,11 @@ class LogicalReplicationReader:
         The message is then passed to the transform function.
     """
 
+    # column definitions are immutable so relations with the same columns (e.g. partitions) share them
+    _column_definitions: "weakref.WeakValueDictionary[typing.Tuple[typing.Any, ...], ColumnDefinition]" = (
+        weakref.WeakValueDictionary()
+    )
+
     def __init__(
         self,
         publication_name: str,
@@ -88,23 +168,93 @@ class LogicalReplicationReader:
         data_store: DataStore,
         metadata_store: MetadataStore = None,
         lsn: typing.Union[int, str] = 0,
+        assume_attnotnull_from_wal: bool = False,
+        worker_queue_size: int = 0,
+        table_filter: typing.Optional[typing.Callable[[TableSchema], bool]] = None,
+        op_filter: typing.Optional[typing.AbstractSet[typing.Union[str, OperationType]]] = None,
+        id_factory: typing.Optional[typing.Callable[[], typing.Any]] = None,
+        feedback_interval: float = 10,
+        change_batch_size: int = 0,
     ) -> None:
         self.dsn = dsn
         self.publication_name = publication_name
         self.slot_name = slot_name
         self.lsn = lsn
+        # if set, only the primary key columns are required and the catalog isn't queried for NOT NULL constraints
+        self.assume_attnotnull_from_wal = assume_attnotnull_from_wal
+        # if set, the messages are decoded and handled by a worker thread so the replication connection
+        # isn't blocked by the data store; the queue is bounded to apply back-pressure on the stream
+        self.worker_queue_size = worker_queue_size
+        # seconds between the status updates that report the flushed lsn to the server; the lsn of every
+        # commit is only recorded and sent with the next update so a busy stream doesn't write per transaction
+        self.feedback_interval = feedback_interval
+        # if greater than 1, up to this many change events are passed to the data store in one call of
+        # `handle_change_events`; the batch is also handed over before any relation, begin or commit message
+        self.change_batch_size = change_batch_size
+        self._pending_changes: typing.List[typing.Tuple[ChangeEvent, ReplicationMessage]] = []
+        # changes of tables for which `table_filter` returns False and operations (e.g. "I", "U", "D", "T")
+        # not in `op_filter` are skipped before they are decoded; relation, begin and commit are always handled
+        self.table_filter = table_filter
+        self.op_filter = op_filter
+        self._included_relations: typing.Dict[int, bool] = {}
         self.data_store = data_store or DataStore()
         # set the callback so datastore can call `commit_callback` to update the lsn in the database
         self.data_store.commit_callback = self.commit_lsn
         self.metadata_store = metadata_store or MetadataStore()
         self.source_db_handler = SourceDBHandler(dsn=self.dsn)
         self.database = self.source_db_handler.conn.get_dsn_parameters()["dbname"]
+        # the reader only reads one database so the row messages look up its bundles directly
+        self._bundles = self.metadata_store.database_bundles(self.database)
         self.connection = None
         self.cursor = None
         self.transaction_metadata = None
-        self._iterator = None
+        self._flush_lsn = 0
+        self._feedback_lsn = 0
+        self._queue: typing.Optional[queue.Queue] = None
+        self._worker: typing.Optional[threading.Thread] = None
+        # tells the worker to discard the queued messages, e.g. after KeyboardInterrupt
+        self._worker_stop = threading.Event()
+        self._worker_error: typing.Optional[Exception] = None
+        # monotonic message ids by default; cheaper than a uuid per message and the lsn identifies the message
+        # anyway, but consumers that need another format (e.g. `uuid.uuid4`) can pass their own `id_factory`
+        self._next_message_id = id_factory or itertools.count(1).__next__
         self._max_count = 0
         self._current_count = 0
+        # map the first byte of the payload to the handler of the message
+        self._dispatch: typing.Dict[int, typing.Callable[[ReplicationMessage], typing.Any]] = {
+            MSG_RELATION: self._process_relation,
+            MSG_BEGIN: self._handle_begin,
+            MSG_INSERT: self._handle_insert,
+            MSG_UPDATE: self._handle_update,
+            MSG_DELETE: self._handle_delete,
+            MSG_TRUNCATE: self._handle_truncate,
+            MSG_COMMIT: self._handle_commit,
+        }
+        # map the first byte of the payload to the data store callback; the rest are change events
+        self._store_dispatch: typing.Dict[int, typing.Callable[[typing.Any, ReplicationMessage], None]] = {
+            MSG_RELATION: self.data_store.handle_relation,
+            MSG_BEGIN: self.data_store.handle_begin,
+            MSG_COMMIT: self.data_store.handle_commit,
+        }
+
+    @property
+    def op_filter(self) -> typing.Optional[typing.AbstractSet[typing.Union[str, OperationType]]]:
+        return self._op_filter
+
+    @op_filter.setter
+    def op_filter(self, op_filter: typing.Optional[typing.AbstractSet[typing.Union[str, OperationType]]]) -> None:
+        included_ops = FILTERABLE_OPERATIONS
+        if op_filter is not None:
+            included_ops = frozenset(op.value if isinstance(op, OperationType) else op for op in op_filter)
+            unsupported = included_ops - FILTERABLE_OPERATIONS
+            if unsupported:
+                raise ValueError(
+                    f"Unsupported operations in op_filter: {', '.join(sorted(map(repr, unsupported)))}"
+                    f" (expected any of {', '.join(sorted(FILTERABLE_OPERATIONS))})"
+                )
+        self._op_filter = op_filter
+        # the message types are checked rather than the filter so skipped messages aren't decoded
+        self._skipped_types = frozenset(ROW_MESSAGES | {MSG_TRUNCATE}) - frozenset(map(ord, included_ops))
 
     def __enter__(self) -> psycopg2.extras.ReplicationCursor:
         self.start_replication()
@@ -116,11 +266,93 @@ class LogicalReplicationReader:
     def consume_stream(self, max_count=0):
         if not self.cursor:
             raise RuntimeError("Cursor not initialized; use `with` statement or call `init_cursor` first")
-        logger.info(f"Starting replication from: {self.database}/{self.publication_name}/{self.slot_name}")
+        logger.info("Starting replication from: %s/%s/%s", self.database, self.publication_name, self.slot_name)
         if max_count:
             self._max_count = max_count
-        with contextlib.suppress(StopIteration):
-            self.cursor.consume_stream(self)
+        if self.worker_queue_size:
+            self._start_worker()
+        try:
+            with contextlib.suppress(StopIteration):
+                if self._worker:
+                    self._poll_stream()
+                else:
+                    self.cursor.consume_stream(self)
+        except BaseException:
+            # the error of the worker (if any) must not replace the one that is already propagating
+            if self._worker:
+                self._stop_worker(raise_error=False)
+            raise
+        if self._worker:
+            self._stop_worker()
+        # the changes of a transaction that was still streaming when the consumer stopped
+        if self._pending_changes and self._worker_error is None:
+            self._flush_changes()
+
+    def _poll_stream(self) -> None:
+        """Pass the messages of the stream to the worker until either of them stops
+
+        Unlike `consume_stream` of the cursor, which only returns to the consumer when there is a message,
+        the wait is limited so an error of the worker is noticed even if the stream is idle.
+        """
+        # psycopg2 sends the status updates when reading so the stream is read at least every feedback interval
+        timeout = min(WORKER_POLL_INTERVAL, self.feedback_interval)
+        while self._worker_error is None:
+            msg = self.cursor.read_message()
+            if msg is not None:
+                self(msg)
+            else:
+                # report the commits the worker handled since the last message
+                self._send_feedback()
+                select.select([self.cursor], [], [], timeout)
+
+    def _start_worker(self) -> None:
+        self._worker_error = None
+        self._worker_stop = threading.Event()
+        self._queue = queue.Queue(maxsize=self.worker_queue_size)
+        # the worker keeps its own references in case it is still running after it was abandoned
+        self._worker = threading.Thread(
+            target=self._run_worker, args=(self._queue, self._worker_stop), name="pypgcdc-worker", daemon=True
+        )
+        self._worker.start()
+
+    def _stop_worker(self, raise_error: bool = True) -> None:
+        """Stop the worker thread and re-raise any error of the worker if `raise_error`
+
+        The queued messages are handled first unless the reader is aborted (`raise_error` is False);
+        then they are discarded and the worker only finishes the message it is handling.
+        """
+        if raise_error:
+            self._queue.put(None)
+            self._worker.join()
+        else:
+            self._worker_stop.set()
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    self._queue.get_nowait()
+            self._queue.put(None)
+            self._worker.join(timeout=WORKER_STOP_TIMEOUT)
+            if self._worker.is_alive():
+                logger.warning("The worker thread did not stop within %s seconds", WORKER_STOP_TIMEOUT)
+        self._worker = None
+        self._queue = None
+        # after an error the connection may be broken; `stop_replication` sends the last position anyway
+        if not raise_error:
+            return
+        self._send_feedback()
+        if self._worker_error is not None and not isinstance(self._worker_error, StopIteration):
+            raise self._worker_error
+
+    def _run_worker(self, work_queue: queue.Queue, stop: threading.Event) -> None:
+        while True:
+            item = work_queue.get()
+            if item is None or stop.is_set():
+                return
+            # after an error the remaining messages are discarded so the consumer never blocks on a full queue
+            if self._worker_error is None:
+                try:
+                    self._handle_message(item)
+                except Exception as err:
+                    self._worker_error = err
 
     def start_replication(self):
         self._current_count = 0
@@ -138,6 +370,7 @@ class LogicalReplicationReader:
                 options=replication_options,
                 start_lsn=self.lsn,
                 decode=False,
+                status_interval=self.feedback_interval,
             )
         except psycopg2.errors.UndefinedObject:  # noqa
             self.cursor.execute("rollback;")
@@ -147,10 +380,16 @@ class LogicalReplicationReader:
                 options=replication_options,
                 start_lsn=self.lsn,
                 decode=False,
+                status_interval=self.feedback_interval,
             )
 
     def stop_replication(self):
         if self.cursor:
+            if self._flush_lsn:
+                # the feedback is normally sent with the periodic status update so make sure
+                # the server knows about the last flushed position before disconnecting
+                with contextlib.suppress(psycopg2.Error):
+                    self.cursor.send_feedback(flush_lsn=self._flush_lsn, force=True)
             self.cursor.close()
             self.cursor = None
         if self.connection:
@@ -159,8 +398,18 @@ class LogicalReplicationReader:
         self._max_count = 0
 
     def commit_lsn(self, lsn: int):
-        if self.cursor:
-            self.cursor.send_feedback(flush_lsn=lsn)
+        if lsn > self._flush_lsn:
+            self._flush_lsn = lsn
+            # with a worker thread the feedback is sent by the replication callback instead
+            if self._queue is None:
+                self._send_feedback()
+
+    def _send_feedback(self) -> None:
+        # without `force` psycopg2 only records the position and sends it with the next status update
+        # (see `feedback_interval`) instead of writing to the socket for every commit
+        if self.cursor and self._flush_lsn > self._feedback_lsn:
+            self._feedback_lsn = self._flush_lsn
+            self.cursor.send_feedback(flush_lsn=self._flush_lsn, force=False)
 
     def _create_slot(self):
         self.cursor.create_replication_slot(self.slot_name, output_plugin="pgoutput")
@@ -173,131 +422,191 @@ class LogicalReplicationReader:
             snapshot=res[2],
             plugin=res[3],
         )
+        self._prefetch_column_metadata()
         self.data_store.handle_slot_created(info)
 
+    def _prefetch_column_metadata(self) -> None:
+        """Cache the metadata of all published columns so the Relation messages don't need to query them"""
+        for row in self.source_db_handler.fetch_publication_column_metadata(self.publication_name):
+            self.metadata_store.add_column_type(self.database, row["atttypid"], row["data_type"], row["atttypmod"])
+            self.metadata_store.add_column_optional(
+                self.database, row["nspname"], row["relname"], row["attname"], row["optional"]
+            )
+
     def __call__(self, msg: psycopg2.extras.ReplicationMessage):
-        message_id = uuid.uuid4()
+        if self._queue is not None:
+            if self._worker_error is not None:
+                raise StopIteration
+            # blocks when the worker falls behind
+            self._queue.put(msg)
+            self._send_feedback()
+        else:
+            self._handle_message(msg)
+
+        self._current_count += 1
+        if self._max_count and self._current_count == self._max_count:
+            raise StopIteration
+
+    def _handle_message(self, msg: psycopg2.extras.ReplicationMessage):
+        payload = msg.payload
+        message_type = payload[0]
+        if message_type in self._skipped_types:
+            return
+        if self.table_filter is not None and message_type in ROW_MESSAGES and not self._is_included(payload):
+            return
         message = ReplicationMessage(
-            message_id=message_id,
+            message_id=self._next_message_id(),
             data_start=msg.data_start,
-            payload=msg.payload,
+            payload=memoryview(payload),
             send_time=msg.send_time,
             data_size=msg.data_size,
             wal_end=msg.wal_end,
         )
         change_event = self._transform_raw(message)
-
-        if isinstance(change_event, TableSchema):
-            self.data_store.handle_relation(change_event, message)
-        elif change_event.op == "B":
-            self.data_store.handle_begin(change_event, message)
-        elif change_event.op == "C":
-            self.data_store.handle_commit(change_event, message)
+        store_handler = self._store_dispatch.get(message_type)
+        if store_handler is None:
+            if self.change_batch_size > 1:
+                self._pending_changes.append((change_event, message))
+                if len(self._pending_changes) >= self.change_batch_size:
+                    self._flush_changes()
+            else:
+                self.data_store.handle_change_event(change_event, message)
         else:
-            self.data_store.handle_change_event(change_event, message)
-
-        self._current_count += 1
-        if self._max_count and self._current_count == self._max_count:
-            raise StopIteration
+            if self._pending_changes:
+                self._flush_changes()
+            store_handler(change_event, message)
+
+    def _flush_changes(self) -> None:
+        """Pass the batched change events to the data store"""
+        changes = self._pending_changes
+        self._pending_changes = []
+        self.data_store.handle_change_events(changes)
+
+    def _is_included(self, payload: bytes) -> bool:
+        """Check if the changes of the relation in the payload pass the `table_filter`"""
+        relation_id = decoders.convert_bytes_to_int(payload[1:5])
+        included = self._included_relations.get(relation_id)
+        if included is None:
+            table_schema = self.metadata_store.table_schema(self.database, relation_id)
+            # a relation that hasn't been seen can't be filtered; the message fails the same way without a filter
+            if table_schema is None:
+                return True
+            included = self.table_filter(table_schema)
+            self._included_relations[relation_id] = included
+        return included
 
     def _transform_raw(self, msg: ReplicationMessage) -> typing.Union[ChangeEvent, Transaction, TableSchema]:
-        message_type = OperationType((msg.payload[:1]).decode("utf-8"))
-        if message_type == OperationType.RELATION:
-            return self._process_relation(message=msg)
-        elif message_type == OperationType.BEGIN:
-            self.transaction_metadata = self._process_begin(message=msg)
-            return self.transaction_metadata
-        # message processors below will throw an error if transaction_metadata doesn't exist
-        elif message_type == OperationType.INSERT:
-            event = self._process_insert(message=msg, transaction=self.transaction_metadata)
-            self._add_key(event)
-            return event
-        elif message_type == OperationType.UPDATE:
-            event = self._process_update(message=msg, transaction=self.transaction_metadata)
-            self._add_key(event)
-            return event
-        elif message_type == OperationType.DELETE:
-            event = self._process_delete(message=msg, transaction=self.transaction_metadata)
-            self._add_key(event)
-            return event
-        elif message_type == OperationType.TRUNCATE:
-            return self._process_truncate(message=msg, transaction=self.transaction_metadata)
-        elif message_type == OperationType.COMMIT:
-            txn = self._process_commit(message=msg, transaction=self.transaction_metadata)
-            self.transaction_metadata = None  # null out this value after commit
-            return txn
+        handler = self._dispatch.get(msg.payload[0])
+        if handler is None:
+            raise ValueError(f"Unsupported message type: {bytes(msg.payload[:1])!r}")
+        return handler(msg)
+
+    def _handle_begin(self, msg: ReplicationMessage) -> Transaction:
+        self.transaction_metadata = self._process_begin(message=msg)
+        return self.transaction_metadata
+
+    # message processors below will throw an error if transaction_metadata doesn't exist
+    def _handle_insert(self, msg: ReplicationMessage) -> ChangeEvent:
+        event = self._process_insert(message=msg, transaction=self.transaction_metadata)
+        self._add_key(event)
+        return event
+
+    def _handle_update(self, msg: ReplicationMessage) -> ChangeEvent:
+        event = self._process_update(message=msg, transaction=self.transaction_metadata)
+        self._add_key(event)
+        return event
+
+    def _handle_delete(self, msg: ReplicationMessage) -> ChangeEvent:
+        event = self._process_delete(message=msg, transaction=self.transaction_metadata)
+        self._add_key(event)
+        return event
+
+    def _handle_truncate(self, msg: ReplicationMessage) -> ChangeEvent:
+        return self._process_truncate(message=msg, transaction=self.transaction_metadata)
+
+    def _handle_commit(self, msg: ReplicationMessage) -> Transaction:
+        txn = self._process_commit(message=msg, transaction=self.transaction_metadata)
+        self.transaction_metadata = None  # null out this value after commit
+        return txn
 
     def _add_key(self, event: ChangeEvent) -> typing.Dict[str, typing.Any]:
         """Add a key to the event; this is either the PK or the whole row"""
+        table_schema = event.table_schema
         if event.before:
-            key = dict(**event.before)
+            key = dict(event.before)
         else:
-            key_columns = event.table_schema.get_key_columns()
-            key = {col: event.after[col] for col in key_columns}
-        key["database"] = self.database
-        key["namespace"] = event.table_schema.namespace
-        key["table"] = event.table_schema.table
+            after = event.after
+            key = {col: after[col] for col in table_schema._key_columns}
+        key.update(table_schema._key_meta)
         event.key = key
         return key
 
     def _process_relation(self, message: ReplicationMessage) -> TableSchema:
         relation_msg: decoders.Relation = decoders.Relation(message.payload)
         relation_id = relation_msg.relation_id
+        # the filter is evaluated again for the schema the relation has from now on
+        self._included_relations.pop(relation_id, None)
         schema = self.metadata_store.table_schema(self.database, relation_id)
         if schema:
             return schema
 
-        column_definitions: typing.List[ColumnDefinition] = []
-        for column in relation_msg.columns:
-            pg_type = self.metadata_store.column_type(self.database, column.type_id)
-            if not pg_type:
-                pg_type = self.source_db_handler.fetch_column_type(type_id=column.type_id, atttypmod=column.atttypmod)
-                self.metadata_store.add_column_type(self.database, column.type_id, pg_type)
-            # pre-compute schema of the table for attaching to messages
-            is_optional = self.source_db_handler.fetch_if_column_is_optional(
-                table_schema=relation_msg.namespace,
-                table_name=relation_msg.relation_name,
-                column_name=column.name,
-            )
-            column_definitions.append(
-                ColumnDefinition(
-                    name=column.name,
-                    part_of_pkey=column.part_of_pkey,
-                    type_id=column.type_id,
-                    type_name=pg_type,
-                    optional=is_optional,
+        namespace = relation_msg.namespace
+        table = relation_msg.relation_name
+        # fetch the metadata of all columns we haven't seen yet in a single round-trip
+        missing: typing.List[str] = []
+        if not self.assume_attnotnull_from_wal:
+            missing = [
+                column.name
+                for column in relation_msg.columns
+                if self.metadata_store.column_type(self.database, column.type_id, column.atttypmod) is None
+                or self.metadata_store.column_optional(self.database, namespace, table, column.name) is None
+            ]
+        if missing:
+            for row in self.source_db_handler.fetch_column_metadata(namespace, table, missing):
+                self.metadata_store.add_column_type(self.database, row["atttypid"], row["data_type"], row["atttypmod"])
+                self.metadata_store.add_column_optional(
+                    self.database, namespace, table, row["attname"], row["optional"]
                 )
-            )
-        # in pydantic Ellipsis (...) indicates a field is required
-        # this should be the type below, but it doesn't work as the kwargs for create_model with mppy
-        # schema_mapping_args: typing.Dict[str, typing.Tuple[type, typing.Optional[EllipsisType]]] = {
-        schema_mapping_args: typing.Dict[str, typing.Any] = {
-            c.name: (
-                convert_pg_type_to_py_type(c.type_name),
-                None if c.optional else ...,
-            )
-            for c in column_definitions
-        }
-        table_model = pydantic.create_model(f"DynamicSchemaModel_{relation_id}", **schema_mapping_args)
-        self.metadata_store.add_table_model(self.database, relation_id, table_model)
-
-        # key only schema definition
-        # https://www.postgresql.org/docs/12/sql-altertable.html#SQL-CREATETABLE-REPLICA-IDENTITY
-        key_only_schema_mapping_args: typing.Dict[str, typing.Any] = {
-            c.name: (convert_pg_type_to_py_type(c.type_name), None if c.optional else ...)
-            for c in column_definitions
-            if c.part_of_pkey is True
+        # types still missing (e.g. the nullability comes from the relation message) are fetched together
+        missing_types = {
+            (column.type_id, column.atttypmod)
+            for column in relation_msg.columns
+            if self.metadata_store.column_type(self.database, column.type_id, column.atttypmod) is None
         }
-        key_schema = pydantic.create_model(f"KeyDynamicSchemaModel_{relation_id}", **key_only_schema_mapping_args)
-        self.metadata_store.add_key_model(self.database, relation_id, key_schema)
+        if missing_types:
+            for row in self.source_db_handler.fetch_column_types(list(missing_types)):
+                self.metadata_store.add_column_type(self.database, row["type_id"], row["data_type"], row["atttypmod"])
 
+        column_definitions: typing.List[ColumnDefinition] = []
+        for column in relation_msg.columns:
+            pg_type = self.metadata_store.column_type(self.database, column.type_id, column.atttypmod)
+            # pre-compute schema of the table for attaching to messages
+            is_optional: typing.Optional[bool]
+            if self.assume_attnotnull_from_wal:
+                # primary key columns can't be null
+                is_optional = not column.part_of_pkey
+            else:
+                is_optional = self.metadata_store.column_optional(self.database, namespace, table, column.name)
+            # a column missing from the catalog (is_optional is None) is treated as optional
+            optional = is_optional is not False
+            key = (column.name, bool(column.part_of_pkey), column.type_id, pg_type, optional)
+            column_definition = self._column_definitions.get(key)
+            if column_definition is None:
+                column_definition = ColumnDefinition(*key)
+                self._column_definitions[key] = column_definition
+            column_definitions.append(column_definition)
         table_schema = TableSchema(
             db=self.database,
-            namespace=relation_msg.namespace,
-            table=relation_msg.relation_name,
+            namespace=namespace,
+            table=table,
             column_definitions=column_definitions,
             relation_id=relation_id,
         )
+        # the values are converted while mapping the tuple data so the rows don't need pydantic validation
+        converters = tuple(convert_pg_type_to_converter(c.type_name) for c in column_definitions)
+        self.metadata_store.add_table_converters(self.database, relation_id, converters)
+        row_builder = compile_row_builder(table_schema._column_names, converters)
+        self.metadata_store.add_table_row_builder(self.database, relation_id, row_builder)
         self.metadata_store.add_table_schema(self.database, relation_id, table_schema)
         return table_schema
 
@@ -322,9 +631,8 @@ class LogicalReplicationReader:
 
     def _process_insert(self, message: ReplicationMessage, transaction: Transaction) -> ChangeEvent:
         decoded_msg: decoders.Insert = decoders.Insert(message.payload)
-        table_schema = self.metadata_store.table_schema(self.database, decoded_msg.relation_id)
-        table_model = self.metadata_store.table_model(self.database, decoded_msg.relation_id)
-        after = map_tuple_to_dict(tuple_data=decoded_msg.new_tuple, relation=table_schema)
+        table_schema, build_row = self._bundles[decoded_msg.relation_id]
+        after = build_row(decoded_msg.new_tuple.column_data)
         return ChangeEvent(
             op=decoded_msg.byte1,
             message_id=message.message_id,
@@ -332,67 +640,71 @@ class LogicalReplicationReader:
             transaction=transaction,
             table_schema=table_schema,
             before=None,
-            after=table_model(**after),
+            after=after,
         )
 
     def _process_update(self, message: ReplicationMessage, transaction: Transaction) -> ChangeEvent:
         decoded_msg: decoders.Update = decoders.Update(message.payload)
-        table_model = self.metadata_store.table_model(self.database, decoded_msg.relation_id)
-        table_schema = self.metadata_store.table_schema(self.database, decoded_msg.relation_id)
-        key_model = self.metadata_store.key_model(self.database, decoded_msg.relation_id)
+        table_schema, build_row = self._bundles[decoded_msg.relation_id]
         if decoded_msg.old_tuple:
-            before_raw = map_tuple_to_dict(tuple_data=decoded_msg.old_tuple, relation=table_schema)
-            if decoded_msg.optional_tuple_identifier == "O":
-                before_typed = table_model(**before_raw)
-            # if there is old tuple and not O then key only schema needed
-            else:
-                before_typed = key_model(**before_raw)
+            before = self._map_old_tuple(
+                decoded_msg.old_tuple, decoded_msg.optional_tuple_identifier, table_schema, build_row
+            )
         else:
-            before_typed = None
-        after = map_tuple_to_dict(tuple_data=decoded_msg.new_tuple, relation=table_schema)
+            before = None
+        after = build_row(decoded_msg.new_tuple.column_data)
         return ChangeEvent(
             op=decoded_msg.byte1,
             message_id=message.message_id,
             lsn=message.data_start,
             transaction=transaction,
             table_schema=table_schema,
-            before=before_typed,
-            after=table_model(**after),
+            before=before,
+            after=after,
         )
 
     def _process_delete(self, message: ReplicationMessage, transaction: Transaction) -> ChangeEvent:
         decoded_msg: decoders.Delete = decoders.Delete(message.payload)
-        table_model = self.metadata_store.table_model(self.database, decoded_msg.relation_id)
-        table_schema = self.metadata_store.table_schema(self.database, decoded_msg.relation_id)
-        key_model = self.metadata_store.key_model(self.database, decoded_msg.relation_id)
-        before_raw = map_tuple_to_dict(tuple_data=decoded_msg.old_tuple, relation=table_schema)
-        if decoded_msg.message_type == "O":
-            # O is from REPLICA IDENTITY FULL and therefore has all columns in before message
-            before_typed = table_model(**before_raw)
-        else:
-            # message type is K and means only replica identity index is present in before tuple
-            # only DEFAULT is implemented so the index can only be the primary key
-            before_typed = key_model(**before_raw)
+        table_schema, build_row = self._bundles[decoded_msg.relation_id]
+        before = self._map_old_tuple(decoded_msg.old_tuple, decoded_msg.message_type, table_schema, build_row)
         return ChangeEvent(
             op=decoded_msg.byte1,
             message_id=message.message_id,
             lsn=message.data_start,
             transaction=transaction,
             table_schema=table_schema,
-            before=before_typed,
+            before=before,
             after=None,
         )
 
+    @staticmethod
+    def _map_old_tuple(
+        old_tuple: decoders.TupleData,
+        identifier: str,
+        table_schema: TableSchema,
+        build_row: typing.Callable[[typing.Sequence[decoders.ColumnData]], typing.Dict[str, typing.Any]],
+    ) -> typing.Dict[str, typing.Any]:
+        """Map the old tuple of an update or delete to the before image of the row"""
+        before = build_row(old_tuple.column_data)
+        if identifier == "O":
+            # O is from REPLICA IDENTITY FULL and therefore has all columns in before message
+            return before
+        # K means only replica identity index is present in before tuple
+        # only DEFAULT is implemented so the index can only be the primary key
+        return {col: before[col] for col in table_schema._key_columns}
+
     def _process_truncate(self, message: ReplicationMessage, transaction: Transaction) -> ChangeEvent:
         decoded_msg: decoders.Truncate = decoders.Truncate(message.payload)
-        yield ChangeEvent(
+        table_schemata = [
+            self.metadata_store.table_schema(self.database, truncated_relation_id)
+            for truncated_relation_id in decoded_msg.relation_ids
+        ]
+        return ChangeEvent(
             op=decoded_msg.byte1,
             message_id=message.message_id,
             lsn=message.data_start,
             transaction=transaction,
-            table_schemata=[
-                self.metadata_store.table_schema(self.database, relation_id) for relation_id in decoded_msg.relation_ids
-            ],
+            table_schemata=table_schemata,
             before=None,
             after=None,
         )
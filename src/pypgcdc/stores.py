@@ -21,24 +21,109 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-import json
+import contextlib
+import functools
 import logging
-from typing import Callable, Dict, Optional, Tuple, Type
+from collections import defaultdict
+from datetime import datetime
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 import pydantic
 
 from pypgcdc.models import (
     ChangeEvent,
+    ColumnDefinition,
     ReplicationMessage,
     SlotInitInfo,
     TableSchema,
     Transaction,
+    json_dumps,
 )
 
 logger = logging.getLogger(__name__)
 
+# returned by lookups of a database that isn't in a map yet
+_EMPTY: Mapping = MappingProxyType({})
+
+# separates the transactions in the log; built once rather than for every transaction
+TRANSACTION_SEPARATOR = "*" * 120
+# maximum number of tables listed in one log record at slot creation
+LOGGED_TABLES_PER_LINE = 100
+# maximum number of distinct table models kept for reuse by tables with the same columns (e.g. partitions)
+TABLE_MODEL_CACHE_SIZE = 1024
+
+# json not tested yet
+PG_TO_PY_TYPES: Dict[str, Any] = {
+    "bigint": int,
+    "integer": int,
+    "smallint": int,
+    "timestamp with time zone": datetime,
+    "timestamp without time zone": datetime,
+    "json": pydantic.Json,
+    "jsonb": pydantic.Json,
+}
+
+
+# a database only has a handful of distinct type names (with modifiers) so the results are cached
+@functools.lru_cache(maxsize=None)
+def convert_pg_type_to_py_type(pg_type_name: str) -> type:
+    py_type = PG_TO_PY_TYPES.get(pg_type_name)
+    if py_type is not None:
+        return py_type
+    # numeric types include the precision and scale, e.g. numeric(10,2)
+    if pg_type_name.startswith("numeric"):
+        return float
+    return str
+
+
+@functools.lru_cache(maxsize=TABLE_MODEL_CACHE_SIZE)
+def _create_model(model_name: str, fields: Tuple[Tuple[str, Any], ...]) -> Type[pydantic.BaseModel]:
+    return pydantic.create_model(model_name, **dict(fields))
+
+
+def create_table_model(
+    model_name: str, column_definitions: Sequence[ColumnDefinition], key_only: bool = False
+) -> Type[pydantic.BaseModel]:
+    """Create a pydantic model of the table columns or reuse one created earlier for the same fields
+
+    If `key_only` is set, the model only has the primary key columns.
+    """
+    # in pydantic Ellipsis (...) indicates a field is required
+    # https://www.postgresql.org/docs/12/sql-altertable.html#SQL-CREATETABLE-REPLICA-IDENTITY
+    fields = tuple(
+        (c.name, (convert_pg_type_to_py_type(c.type_name), None if c.optional else ...))
+        for c in column_definitions
+        if not key_only or c.part_of_pkey is True
+    )
+    return _create_model(model_name, fields)
+
+
+@contextlib.contextmanager
+def closing_connection(dsn: str) -> Iterator[psycopg2.extensions.connection]:
+    """Connect to the dsn for the duration of the block; the transaction is committed and the connection closed"""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
 
 class DataStore:
     """DataStore is an example of a data consumer that is meant to handle the initial sync as well as any changes.
@@ -53,104 +138,199 @@ class DataStore:
 
     """
 
-    def __init__(self, quiet=False) -> None:
+    def __init__(
+        self,
+        quiet=False,
+        conn_factory: Optional[Callable[[str], ContextManager[psycopg2.extensions.connection]]] = None,
+    ) -> None:
         self.txn_id = None
         self.txn_ts = None
         self.txn_lsn = None
         self.commit_callback: Optional[Callable] = None
         self.quiet = quiet
+        # returns a context manager with the connection used to read the initial state from the dsn; the connection
+        # is released when the block exits, e.g. returned with `putconn` to a pool the factory takes it from
+        self.conn_factory = conn_factory or closing_connection
 
     @property
-    def commit_callback(self) -> Optional[Callable]:
-        return self._commit_callback
+    def quiet(self) -> bool:
+        return self._quiet
 
-    @commit_callback.setter
-    def commit_callback(self, callback: Optional[Callable]) -> None:
-        self._commit_callback = callback
+    @quiet.setter
+    def quiet(self, quiet: bool) -> None:
+        self._quiet = quiet
+        # pick the change event logger once instead of checking `quiet` for every change
+        self._log_change_event = self._log_change_event_quiet if quiet else self._log_change_event_verbose
 
     def handle_begin(self, txn: Transaction, message: ReplicationMessage) -> None:
         self.txn_id = txn.tx_id
         self.txn_ts = txn.commit_ts
         self.txn_lsn = txn.begin_lsn
-        if not self.quiet:
-            logger.info("*" * 120)
-            logger.info(f"{message.message_id}:{txn.json(indent=2)}")
+        # the models are only serialized if the log records are going to be emitted
+        if not self.quiet and logger.isEnabledFor(logging.INFO):
+            logger.info(TRANSACTION_SEPARATOR)
+            logger.info("%s:%s", message.message_id, txn.json(indent=2))
 
     def handle_commit(self, txn: Transaction, message: ReplicationMessage) -> None:
         self.txn_id = None
         self.txn_ts = None
         self.txn_lsn = None
         self.commit_callback(txn.begin_lsn)
-        if not self.quiet:
-            logger.info(f"{message.message_id}:{txn.json(indent=2)}")
-            logger.info(f"***** {txn} *****")
+        if not self.quiet and logger.isEnabledFor(logging.INFO):
+            logger.info("%s:%s", message.message_id, txn.json(indent=2))
+            logger.info("***** %s *****", txn)
 
     def handle_slot_created(self, info: SlotInitInfo) -> None:
-        logger.info(info)
-        logger.info(f"Processing publication {info.publication_name}")
-        q1 = "begin transaction isolation level repeatable read"
-        q2 = f"set transaction snapshot '{info.snapshot}'"
-        q3 = f"select * from pg_publication_tables where pubname = '{info.publication_name}'"
-        with psycopg2.connect(info.dsn) as conn:
+        logger.info("Processing publication %s (slot=%s)", info.publication_name, info.slot_name)
+        logger.debug("%r", info)
+        # the statements are sent together in the transaction psycopg2 begins (a separate BEGIN round-trip),
+        # which reads the state at the slot's snapshot
+        query = """set transaction isolation level repeatable read;
+            set transaction snapshot %s;
+            select schemaname, tablename from pg_publication_tables where pubname = %s;
+        """
+        with self.conn_factory(info.dsn) as conn:
             with conn.cursor() as cur:
-                cur.execute(q1)
-                cur.execute(q2)
-                cur.execute(q3)
-                result = cur.fetchall()
-                for row in result:
-                    logger.info(f"Including table {row[1]}.{row[2]}")
+                cur.execute(query, (info.snapshot, info.publication_name))
+                tables = [f"{row[0]}.{row[1]}" for row in cur]
+        # one record per batch of tables rather than per table for publications with many tables
+        for start in range(0, len(tables), LOGGED_TABLES_PER_LINE):
+            end = start + LOGGED_TABLES_PER_LINE
+            logger.info("Including tables: %s", ", ".join(tables[start:end]))
 
     def handle_change_event(self, event: ChangeEvent, message: ReplicationMessage) -> None:
-        if not self.quiet:
-            logger.info(f"{message.message_id}:{event.json(indent=2)}")
-        else:
-            data = {
-                "message_id": message.message_id,
-                "operation": event.op,
-                "key": event.key,
-                "before": event.before,
-                "after": event.after,
-            }
-            logger.info(json.dumps(data, indent=2, default=str))
+        if logger.isEnabledFor(logging.INFO):
+            self._log_change_event(event, message)
+
+    def _log_change_event_verbose(self, event: ChangeEvent, message: ReplicationMessage) -> None:
+        logger.info("%s:%s", message.message_id, event.json(indent=2))
+
+    def _log_change_event_quiet(self, event: ChangeEvent, message: ReplicationMessage) -> None:
+        data = {
+            "message_id": message.message_id,
+            "operation": event.op,
+            "key": event.key,
+            "before": event.before,
+            "after": event.after,
+        }
+        logger.info(json_dumps(data, indent=2))
+
+    def handle_change_events(self, events: List[Tuple[ChangeEvent, ReplicationMessage]]) -> None:
+        """Handle a batch of change events (see `change_batch_size` of the reader)
+
+        Data stores writing to a database can override this to write the whole batch at once,
+        e.g. with `psycopg2.extras.execute_values`, instead of a round-trip per change.
+        """
+        for event, message in events:
+            self.handle_change_event(event, message)
 
     def handle_relation(self, relation: TableSchema, message: ReplicationMessage) -> None:
-        if not self.quiet:
-            logger.info(f"{message.message_id}:{relation.json(indent=2)}")
+        if not self.quiet and logger.isEnabledFor(logging.INFO):
+            logger.info("%s:%s", message.message_id, relation.json(indent=2))
 
 
 class MetadataStore:
     """MetadataStore is used to keep track of the table schemas and the table models."""
 
     def __init__(self):
-        # save map of type oid to readable name
-        self.pg_types: Dict[Tuple[str, int], str] = dict()
+        # save map of type oid and type modifier to readable name
+        self.pg_types: Dict[Tuple[str, int, int], str] = dict()
+        # save map of (namespace, table, column) to whether the column is nullable
+        self.column_optionals: Dict[Tuple[str, str, str, str], bool] = dict()
+        # the maps below are keyed by database and then by relid so a lookup doesn't build a key tuple
         # table schema as described in the replication message
-        self.table_schemas: Dict[Tuple[str, int], TableSchema] = dict()  # map relid to table schema
-        # table model for creating "row" objects
-        self.table_models: Dict[Tuple[str, int], Type[pydantic.BaseModel]] = dict()
+        self.table_schemas: Dict[str, Dict[int, TableSchema]] = defaultdict(dict)  # map relid to table schema
+        # table model for creating "row" objects; only created when a consumer asks for it
+        self.table_models: Dict[str, Dict[int, Type[pydantic.BaseModel]]] = defaultdict(dict)
         # key only model for creating "row" that only contain the PK column changes
-        self.key_models: Dict[Tuple[str, int], Type[TableSchema]] = dict()
+        self.key_models: Dict[str, Dict[int, Type[pydantic.BaseModel]]] = defaultdict(dict)
+        # functions converting the text values of each column to the column type
+        self.column_converters: Dict[str, Dict[int, Tuple[Optional[Callable[[str], Any]], ...]]] = defaultdict(dict)
+        # functions building the row dict of a table from the column data of a tuple
+        self.row_builders: Dict[str, Dict[int, Callable[[Sequence[Any]], Dict[str, Any]]]] = defaultdict(dict)
+        # table schema and row builder together so the row messages need a single lookup
+        self.bundles: Dict[str, Dict[int, Tuple[TableSchema, Callable[[Sequence[Any]], Dict[str, Any]]]]] = defaultdict(
+            dict
+        )
+
+    def add_column_type(self, database: str, type_id: int, data_type: str, atttypmod: int = -1):
+        self.pg_types[(database, type_id, atttypmod)] = data_type
+
+    def column_type(self, database: str, type_id: int, atttypmod: int = -1) -> str:
+        return self.pg_types.get((database, type_id, atttypmod))
 
-    def add_column_type(self, database: str, type_id: int, data_type: str):
-        self.pg_types[(database, type_id)] = data_type
+    def add_column_optional(self, database: str, namespace: str, table: str, column: str, optional: bool) -> None:
+        self.column_optionals[(database, namespace, table, column)] = optional
 
-    def column_type(self, database: str, type_id: int) -> str:
-        return self.pg_types.get((database, type_id))
+    def column_optional(self, database: str, namespace: str, table: str, column: str) -> Optional[bool]:
+        return self.column_optionals.get((database, namespace, table, column))
 
     def add_table_schema(self, database: str, relid: int, table_schema: TableSchema) -> None:
-        self.table_schemas[(database, relid)] = table_schema
+        self.table_schemas[database][relid] = table_schema
+        # the models of the previous schema of the relation are created again on the next lookup
+        self.table_models.get(database, {}).pop(relid, None)
+        self.key_models.get(database, {}).pop(relid, None)
+        self._update_bundle(database, relid)
 
     def table_schema(self, database: str, relid: int) -> TableSchema:
-        return self.table_schemas.get((database, relid))
+        return self.table_schemas.get(database, _EMPTY).get(relid)
 
-    def add_key_model(self, database: str, relid: int, table_schema: Type[TableSchema]) -> None:
-        self.key_models[(database, relid)] = table_schema
+    def add_key_model(self, database: str, relid: int, key_model: Type[pydantic.BaseModel]) -> None:
+        self.key_models[database][relid] = key_model
 
-    def key_model(self, database: str, relid: int) -> Type[TableSchema]:
-        return self.key_models.get((database, relid))
+    def key_model(self, database: str, relid: int) -> Type[pydantic.BaseModel]:
+        """Return the key only model of the table; it is created from the table schema on first use"""
+        model = self.key_models.get(database, _EMPTY).get(relid)
+        if model is None:
+            table_schema = self.table_schema(database, relid)
+            if table_schema is not None:
+                model = create_table_model("KeyDynamicSchemaModel", table_schema.column_definitions, key_only=True)
+                self.key_models[database][relid] = model
+        return model
 
     def add_table_model(self, database: str, relid: int, table_model: Type[pydantic.BaseModel]) -> None:
-        self.table_models[(database, relid)] = table_model
+        self.table_models[database][relid] = table_model
 
     def table_model(self, database: str, relid: int) -> Type[pydantic.BaseModel]:
-        return self.table_models.get((database, relid))
+        """Return the model of the table; it is created from the table schema on first use"""
+        model = self.table_models.get(database, _EMPTY).get(relid)
+        if model is None:
+            table_schema = self.table_schema(database, relid)
+            if table_schema is not None:
+                model = create_table_model("DynamicSchemaModel", table_schema.column_definitions)
+                self.table_models[database][relid] = model
+        return model
+
+    def add_table_converters(
+        self, database: str, relid: int, converters: Tuple[Optional[Callable[[str], Any]], ...]
+    ) -> None:
+        self.column_converters[database][relid] = converters
+
+    def table_converters(self, database: str, relid: int) -> Tuple[Optional[Callable[[str], Any]], ...]:
+        return self.column_converters.get(database, _EMPTY).get(relid)
+
+    def add_table_row_builder(
+        self, database: str, relid: int, row_builder: Callable[[Sequence[Any]], Dict[str, Any]]
+    ) -> None:
+        self.row_builders[database][relid] = row_builder
+        self._update_bundle(database, relid)
+
+    def table_row_builder(self, database: str, relid: int) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+        return self.row_builders.get(database, _EMPTY).get(relid)
+
+    def bundle(
+        self, database: str, relid: int
+    ) -> Optional[Tuple[TableSchema, Callable[[Sequence[Any]], Dict[str, Any]]]]:
+        return self.bundles.get(database, _EMPTY).get(relid)
+
+    def database_bundles(
+        self, database: str
+    ) -> Dict[int, Tuple[TableSchema, Callable[[Sequence[Any]], Dict[str, Any]]]]:
+        """Return the bundles of a database by relid; the dict is updated in place as relations are added"""
+        return self.bundles[database]
+
+    def _update_bundle(self, database: str, relid: int) -> None:
+        table_schema = self.table_schema(database, relid)
+        row_builder = self.table_row_builder(database, relid)
+        if table_schema is not None and row_builder is not None:
+            self.bundles[database][relid] = (table_schema, row_builder)
@@ -22,7 +22,7 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
-from typing import List
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 import psycopg2
 import psycopg2.extras
@@ -40,58 +40,139 @@ class SourceDBHandler:
     def __init__(self, dsn: str) -> None:
         self.dsn = dsn
         self.conn = None
+        self._cursor: Optional[psycopg2.extras.DictCursor] = None
         self.connect()
 
     def connect(self) -> None:
         self.conn = psycopg2.connect(self.dsn)
         self.conn.autocommit = True
+        self._cursor = None
+
+    def _get_cursor(self) -> psycopg2.extras.DictCursor:
+        """Return the cursor of the connection, the same cursor is reused for all queries"""
+        if self._cursor is None or self._cursor.closed:
+            try:
+                self._cursor = psycopg2.extras.DictCursor(self.conn)
+            except Exception as err:
+                raise ResourceError("Could not get cursor") from err
+        return self._cursor
+
+    def _recover(self) -> None:
+        """Make the handler usable again after a failed query"""
+        if self.conn.closed:
+            self.connect()
+        else:
+            self.conn.rollback()
 
-    def fetchone(self, query: str) -> psycopg2.extras.DictRow:
+    def fetchone(self, query: str, params: Optional[Sequence] = None) -> psycopg2.extras.DictRow:
+        cursor = self._get_cursor()
         try:
-            cursor = psycopg2.extras.DictCursor(self.conn)
+            cursor.execute(query, params)
+            result: psycopg2.extras.DictRow = cursor.fetchone()
+            return result
         except Exception as err:
-            raise ResourceError("Could not get cursor") from err
+            self._recover()
+            raise QueryError("Error running query") from err
+
+    def fetch(self, query: str, params: Optional[Sequence] = None) -> List[psycopg2.extras.DictRow]:
+        cursor = self._get_cursor()
         try:
-            cursor.execute(query)
-            result: psycopg2.extras.DictRow = cursor.fetchone()
+            cursor.execute(query, params)
+            result: List[psycopg2.extras.DictRow] = cursor.fetchall()
             return result
         except Exception as err:
-            self.conn.rollback()
+            self._recover()
             raise QueryError("Error running query") from err
-        finally:
-            cursor.close()
 
-    def fetch(self, query: str) -> List[psycopg2.extras.DictRow]:
+    def fetch_iter(
+        self, query: str, params: Optional[Sequence] = None, batch_size: int = 1000
+    ) -> Iterator[psycopg2.extras.DictRow]:
+        """Iterate over the result rows, creating the row objects `batch_size` rows at a time
+
+        The rows are read with a separate cursor so other queries can run while iterating.
+        """
         try:
             cursor = psycopg2.extras.DictCursor(self.conn)
         except Exception as err:
             raise ResourceError("Could not get cursor") from err
         try:
-            cursor.execute(query)
-            result: List[psycopg2.extras.DictRow] = cursor.fetchall()
-            return result
-        except Exception as err:
-            self.conn.rollback()
-            raise QueryError("Error running query") from err
+            try:
+                cursor.execute(query, params)
+            except Exception as err:
+                self._recover()
+                raise QueryError("Error running query") from err
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
         finally:
             cursor.close()
 
     def fetch_column_type(self, type_id: int, atttypmod: int) -> str:
         """Get formatted data type name"""
-        query = f"SELECT format_type({type_id}, {atttypmod}) AS data_type"
-        result = self.fetchone(query=query)
+        query = "SELECT format_type(%s, %s) AS data_type"
+        result = self.fetchone(query=query, params=(type_id, atttypmod))
         return result["data_type"]
 
+    def fetch_column_types(self, types: Sequence[Tuple[int, int]]) -> List[psycopg2.extras.DictRow]:
+        """Get formatted data type names of several (type_id, atttypmod) pairs in one round-trip"""
+        query = """SELECT t.type_id, t.atttypmod, format_type(t.type_id, t.atttypmod) AS data_type
+            FROM unnest(%s::oid[], %s::int4[]) AS t(type_id, atttypmod);
+        """
+        return self.fetch(query=query, params=([t[0] for t in types], [t[1] for t in types]))
+
     def fetch_if_column_is_optional(self, table_schema: str, table_name: str, column_name: str) -> bool:
         """Check if a column is optional"""
-        query = f"""SELECT attnotnull
-            FROM pg_attribute
-            WHERE attrelid = '{table_schema}.{table_name}'::regclass
-            AND attname = '{column_name}';
+        query = """SELECT a.attnotnull
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s
+            AND c.relname = %s
+            AND a.attname = %s;
         """
-        result = self.fetchone(query=query)
+        result = self.fetchone(query=query, params=(table_schema, table_name, column_name))
         # attnotnull returns if column has not null constraint, we want to flip it
         return False if result["attnotnull"] else True
 
+    def fetch_column_metadata(
+        self, table_schema: str, table_name: str, column_names: Sequence[str]
+    ) -> List[psycopg2.extras.DictRow]:
+        """Get the formatted data type name and optionality of several columns in one round-trip"""
+        query = """SELECT a.attname, a.atttypid, a.atttypmod,
+                format_type(a.atttypid, a.atttypmod) AS data_type,
+                NOT a.attnotnull AS optional
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s
+            AND c.relname = %s
+            AND a.attname = ANY(%s)
+            AND a.attnum > 0
+            AND NOT a.attisdropped;
+        """
+        return self.fetch(query=query, params=(table_schema, table_name, list(column_names)))
+
+    def fetch_publication_column_metadata(self, publication_name: str) -> Iterator[psycopg2.extras.DictRow]:
+        """Iterate over the formatted data type name and optionality of all columns of all tables in a publication
+
+        A publication can have many tables so the rows are created in batches while they are consumed.
+        """
+        query = """SELECT n.nspname, c.relname, a.attname, a.atttypid, a.atttypmod,
+                format_type(a.atttypid, a.atttypmod) AS data_type,
+                NOT a.attnotnull AS optional
+            FROM pg_publication_tables p
+            JOIN pg_namespace n ON n.nspname = p.schemaname
+            JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = p.tablename
+            JOIN pg_attribute a ON a.attrelid = c.oid
+            WHERE p.pubname = %s
+            AND a.attnum > 0
+            AND NOT a.attisdropped;
+        """
+        return self.fetch_iter(query=query, params=(publication_name,))
+
     def close(self) -> None:
+        if self._cursor is not None:
+            self._cursor.close()
         self.conn.close()
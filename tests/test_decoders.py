@@ -141,3 +141,22 @@ def test_tuple_data() -> None:
     assert test_tuple.column_data[0].col_data_category == "t"
     assert test_tuple.column_data[0].col_data_length == 1
     assert test_tuple.column_data[0].col_data == "1"
+
+
+def test_memoryview_buffer() -> None:
+    message = b"I\x00\x00@\x01N\x00\x02t\x00\x00\x00\x015t\x00\x00\x00\x162012-01-01 12:00:00+00"
+    decoded_msg = decoders.Insert(memoryview(message))
+    assert decoded_msg.byte1 == "I"
+    assert decoded_msg.relation_id == 16385
+    assert decoded_msg.new_tuple.column_data[1] == ColumnData(
+        col_data_category="t", col_data_length=22, col_data="2012-01-01 12:00:00+00"
+    )
+
+    message = (
+        b"R\x00\x00@\x01public\x00test_table\x00d\x00\x02\x01"
+        b"id\x00\x00\x00\x00\x17\xff\xff\xff\xff\x00created\x00\x00\x00\x04\xa0\xff\xff\xff\xff"
+    )
+    decoded_msg = decoders.Relation(memoryview(message))
+    assert decoded_msg.namespace == "public"
+    assert decoded_msg.relation_name == "test_table"
+    assert decoded_msg.columns[1] == ColumnType(part_of_pkey=0, name="created", type_id=1184, atttypmod=-1)
@@ -0,0 +1,74 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+import pypgcdc.models
+from pypgcdc import ReplicationMessage, Transaction
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run the test with orjson (if it is installed) and with the standard library json"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(pypgcdc.models, "orjson", None)
+    return request.param
+
+
+def test_replication_message_serialization(json_backend: str) -> None:
+    message = ReplicationMessage(
+        message_id=1,
+        data_start=23,
+        payload=memoryview(b"B\x00\x01"),
+        send_time=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        data_size=3,
+        wal_end=23,
+    )
+    assert message.dict() == {
+        "message_id": 1,
+        "data_start": 23,
+        "payload": b"B\x00\x01",
+        "send_time": datetime(2020, 1, 1, tzinfo=timezone.utc),
+        "data_size": 3,
+        "wal_end": 23,
+    }
+    assert json.loads(message.json()) == {
+        "message_id": 1,
+        "data_start": 23,
+        "payload": "B\x00\x01",
+        "send_time": "2020-01-01T00:00:00+00:00",
+        "data_size": 3,
+        "wal_end": 23,
+    }
+
+
+def test_json_dumps(json_backend: str) -> None:
+    value = {
+        "timestamp": datetime(2020, 1, 1, 12, 30, 0, 123456, tzinfo=timezone.utc),
+        "naive": datetime(2020, 1, 1),
+        "amount": Decimal("10.20"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "txn": Transaction(op="B", tx_id=1, begin_lsn=2, commit_ts=datetime(2020, 1, 1, tzinfo=timezone.utc)),
+    }
+    expected = {
+        "timestamp": "2020-01-01T12:30:00.123456+00:00",
+        "naive": "2020-01-01T00:00:00",
+        "amount": "10.20",
+        "id": "12345678-1234-5678-1234-567812345678",
+        "txn": {
+            "op": "B",
+            "tx_id": 1,
+            "begin_lsn": 2,
+            "commit_ts": "2020-01-01T00:00:00+00:00",
+            "commit_lsn": None,
+        },
+    }
+    assert json.loads(pypgcdc.models.json_dumps(value)) == expected
+    assert json.loads(pypgcdc.models.json_dumps(value, indent=2)) == expected
+    assert pypgcdc.models.json_dumps([1], indent=2) == "[\n  1\n]"
+    # only the standard library supports other indents
+    assert pypgcdc.models.json_dumps([1], indent=4) == "[\n    1\n]"
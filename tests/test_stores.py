@@ -0,0 +1,81 @@
+import contextlib
+import json
+import logging
+import typing
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from pypgcdc import (
+    ChangeEvent,
+    DataStore,
+    ReplicationMessage,
+    SlotInitInfo,
+    Transaction,
+)
+
+
+def test_handle_slot_created_releases_connection(caplog: pytest.LogCaptureFixture) -> None:
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.__iter__.return_value = iter([("public", "integration"), ("public", "control")])
+    connection = MagicMock()
+    connection.cursor.return_value = cursor
+    released: typing.List[MagicMock] = []
+
+    @contextlib.contextmanager
+    def conn_factory(dsn: str) -> typing.Iterator[MagicMock]:
+        # e.g. a connection taken from a pool and returned with `putconn`
+        assert dsn == "postgres://localhost/unittest"
+        try:
+            yield connection
+        finally:
+            released.append(connection)
+
+    info = SlotInitInfo(
+        dsn="postgres://localhost/unittest",
+        publication_name="unittest_publication",
+        slot_name="unittest_slot",
+        flush_lsn="0/16B3748",
+        snapshot="00000003-00000002-1",
+        plugin="pgoutput",
+    )
+    data_store = DataStore(conn_factory=conn_factory)
+    with caplog.at_level(logging.INFO, logger="pypgcdc"):
+        data_store.handle_slot_created(info)
+    assert released == [connection]
+    assert cursor.execute.call_args.args[1] == ("00000003-00000002-1", "unittest_publication")
+    assert "Including tables: public.integration, public.control" in caplog.messages
+
+
+@pytest.mark.parametrize("quiet", [False, True])
+def test_handle_change_event_quiet(caplog: pytest.LogCaptureFixture, quiet: bool) -> None:
+    txn = Transaction(op="B", tx_id=1, begin_lsn=2, commit_ts=datetime(2020, 1, 1, tzinfo=timezone.utc))
+    event = ChangeEvent(op="I", message_id=3, lsn=4, transaction=txn, after={"id": 10}, key={"id": 10})
+    message = ReplicationMessage(
+        message_id=3, data_start=4, payload=memoryview(b"I"), send_time=txn.commit_ts, data_size=1, wal_end=4
+    )
+    data_store = DataStore(quiet=True)
+    # the logger is picked when the setting changes
+    data_store.quiet = quiet
+    with caplog.at_level(logging.INFO, logger="pypgcdc"):
+        data_store.handle_change_event(event, message)
+    assert len(caplog.messages) == 1
+    if quiet:
+        assert json.loads(caplog.messages[0]) == {
+            "message_id": 3,
+            "operation": "I",
+            "key": {"id": 10},
+            "before": None,
+            "after": {"id": 10},
+        }
+    else:
+        message_id, serialized = caplog.messages[0].split(":", 1)
+        assert message_id == "3"
+        assert json.loads(serialized) == json.loads(event.json())
+    # nothing is serialized if the records aren't logged
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="pypgcdc"):
+        data_store.handle_change_event(event, message)
+    assert caplog.messages == []
@@ -24,6 +24,14 @@ def cursor() -> typing.Generator[psycopg2.extras.DictCursor, None, None]:
     connection.close()
 
 
+@pytest.fixture(scope="module")
+def handler() -> typing.Generator[pypgcdc.SourceDBHandler, None, None]:
+    # one connection for all tests; a failed query doesn't affect the following ones
+    source_db_handler = pypgcdc.SourceDBHandler(dsn=DSN)
+    yield source_db_handler
+    source_db_handler.close()
+
+
 @pytest.fixture(scope="module")
 def table(cursor: psycopg2.extras.DictCursor) -> None:
     query = """
@@ -36,47 +44,86 @@ def table(cursor: psycopg2.extras.DictCursor) -> None:
     cursor.execute(query)
 
 
-def test_source_db_handler_fetchone() -> None:
-    handler = pypgcdc.SourceDBHandler(dsn=DSN)
-    handler.connect()
+def test_source_db_handler_fetchone(handler: pypgcdc.SourceDBHandler) -> None:
     result = handler.fetchone("SELECT 1 AS n;")
     assert result["n"] == 1
     # test invalid query
     with pytest.raises(pypgcdc.QueryError):
         handler.fetchone("SELECT COUNT(*) FROM public.missing_table")
-    handler.close()
 
 
-def test_source_db_handler_fetch() -> None:
-    handler = pypgcdc.SourceDBHandler(dsn=DSN)
-    handler.connect()
+def test_source_db_handler_fetch(handler: pypgcdc.SourceDBHandler) -> None:
     result = handler.fetch("SELECT n FROM generate_series(0, 5) AS n;")
     assert result == [[n] for n in range(6)]
     # test invalid query
     with pytest.raises(pypgcdc.QueryError):
         handler.fetch("SELECT abcd")
-    handler.close()
+    # the handler is still usable after a failed query
+    result = handler.fetch("SELECT n FROM generate_series(0, 1) AS n;")
+    assert result == [[0], [1]]
+
+
+def test_source_db_handler_fetch_iter(handler: pypgcdc.SourceDBHandler) -> None:
+    rows = handler.fetch_iter("SELECT n FROM generate_series(0, %s) AS n;", params=(2500,), batch_size=1000)
+    assert [row["n"] for row in rows] == list(range(2501))
+    # test invalid query
+    with pytest.raises(pypgcdc.QueryError):
+        list(handler.fetch_iter("SELECT abcd"))
 
 
-def test_source_db_handler_column_optional(table: typing.Callable[[None], None]) -> None:
-    handler = pypgcdc.SourceDBHandler(dsn=DSN)
-    handler.connect()
+def test_source_db_handler_column_optional(
+    handler: pypgcdc.SourceDBHandler, table: typing.Callable[[None], None]
+) -> None:
     result = handler.fetch_if_column_is_optional(table_schema="public", table_name="utils", column_name="c0")
     assert result is False
     result = handler.fetch_if_column_is_optional(table_schema="public", table_name="utils", column_name="c1")
     assert result is True
     result = handler.fetch_if_column_is_optional(table_schema="public", table_name="utils", column_name="c2")
     assert result is False
-    handler.close()
 
 
 def test_source_db_handler_column_type(
-    cursor: psycopg2.extras.DictCursor, table: typing.Callable[[None], None]
+    handler: pypgcdc.SourceDBHandler, cursor: psycopg2.extras.DictCursor, table: typing.Callable[[None], None]
 ) -> None:
     cursor.execute("SELECT oid FROM pg_type WHERE typname='timestamptz'")
     oid = cursor.fetchone()
-    handler = pypgcdc.SourceDBHandler(dsn=DSN)
-    handler.connect()
     result = handler.fetch_column_type(type_id=oid["oid"], atttypmod=-1)
     assert result == "timestamp with time zone"
-    handler.close()
+
+
+def test_source_db_handler_column_metadata(
+    handler: pypgcdc.SourceDBHandler, table: typing.Callable[[None], None]
+) -> None:
+    rows = handler.fetch_column_metadata(table_schema="public", table_name="utils", column_names=["c0", "c1", "c2"])
+    result = {row["attname"]: (row["data_type"], row["optional"]) for row in rows}
+    assert result == {
+        "c0": ("integer", False),
+        "c1": ("timestamp with time zone", True),
+        "c2": ("text", False),
+    }
+
+
+def test_source_db_handler_publication_column_metadata(
+    handler: pypgcdc.SourceDBHandler, cursor: psycopg2.extras.DictCursor, table: typing.Callable[[None], None]
+) -> None:
+    cursor.execute("DROP PUBLICATION IF EXISTS utils_publication;")
+    cursor.execute("CREATE PUBLICATION utils_publication FOR TABLE public.utils;")
+    rows = handler.fetch_publication_column_metadata(publication_name="utils_publication")
+    result = {(row["nspname"], row["relname"], row["attname"]): (row["data_type"], row["optional"]) for row in rows}
+    assert result == {
+        ("public", "utils", "c0"): ("integer", False),
+        ("public", "utils", "c1"): ("timestamp with time zone", True),
+        ("public", "utils", "c2"): ("text", False),
+    }
+    cursor.execute("DROP PUBLICATION utils_publication;")
+
+
+def test_source_db_handler_column_types(handler: pypgcdc.SourceDBHandler, cursor: psycopg2.extras.DictCursor) -> None:
+    cursor.execute("SELECT oid FROM pg_type WHERE typname='numeric'")
+    oid = cursor.fetchone()["oid"]
+    # atttypmod of numeric(10,2) is ((10 << 16) | 2) + 4
+    rows = handler.fetch_column_types(types=[(oid, -1), (oid, (10 << 16 | 2) + 4)])
+    assert {(row["type_id"], row["atttypmod"]): row["data_type"] for row in rows} == {
+        (oid, -1): "numeric",
+        (oid, (10 << 16 | 2) + 4): "numeric(10,2)",
+    }